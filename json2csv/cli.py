@@ -1,30 +1,12 @@
 import sys
 import click
-from pathlib import Path
 from .utils import safe_path
-from .converter import flatten_to_csv, normalize_to_csv
+from .converter import flatten_to_csv, normalize_to_csv, COMPRESSION_SUFFIXES
 
 VERSION = "0.1.0"
 
-@click.command(context_settings={"help_option_names": ["-h", "--help"]})
-@click.version_option(version=VERSION, prog_name="json2csv")
-@click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
-def main(verbose):
-    """
-    JSON → CSV Converter Interactive CLI
-
-    Each iteration, choose conversion mode:
-    (F)lattened → single CSV file
-    (N)ormalized → multiple CSV files
-    """
-    click.secho("\nJSON → CSV Converter", fg="cyan", bold=True)
-
-    while True:
-
-        click.echo("Conversion Options:")
-        click.secho("  • flattened  → single CSV with path-style columns & indexed arrays", fg="green")
-        click.secho("  • normalized → multiple CSV files with root.csv, foreign keys, surrogate IDs", fg="green")
-        click.echo(r"""
+# Shown once per session, before the first mode prompt
+APPROACH_OVERVIEW = r"""
         ──────────────────────────  APPROACH OVERVIEW  ──────────────────────────
         Flattened  → 1 CSV (default approach from the project's instructiosn)
         • Every JSON field—no matter how deeply nested—turns into a column.
@@ -50,7 +32,42 @@ def main(verbose):
             Pick N if you plan to load into a relational DB or do normalized analytics.
             Press <Enter> to accept the default (Flattened).
         ─────────────────────────────────────────────────────────────────────────
-        """)
+        """
+
+@click.command(context_settings={"help_option_names": ["-h", "--help"]})
+@click.version_option(version=VERSION, prog_name="json2csv")
+@click.option("-v", "--verbose", is_flag=True, help="Enable verbose output.")
+@click.option(
+    "--compress",
+    type=click.Choice(sorted(COMPRESSION_SUFFIXES), case_sensitive=False),
+    default=None,
+    help="Compress the output CSV files (e.g. gzip → .csv.gz).",
+)
+@click.option(
+    "-j", "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Worker processes for flattening NDJSON (.ndjson/.jsonl) input.",
+)
+def main(verbose, compress, jobs):
+    """
+    JSON → CSV Converter Interactive CLI
+
+    Each iteration, choose conversion mode:
+    (F)lattened → single CSV file
+    (N)ormalized → multiple CSV files
+    """
+    click.secho("\nJSON → CSV Converter", fg="cyan", bold=True)
+
+    first_round = True
+    while True:
+
+        click.echo("Conversion Options:")
+        click.secho("  • flattened  → single CSV with path-style columns & indexed arrays", fg="green")
+        click.secho("  • normalized → multiple CSV files with root.csv, foreign keys, surrogate IDs", fg="green")
+        if first_round:
+            click.echo(APPROACH_OVERVIEW)
+            first_round = False
         # Prompt for mode each iteration
         click.echo("Select conversion mode:")
         choice = click.prompt(
@@ -72,19 +89,18 @@ def main(verbose):
         if mode == "flattened":
             raw_out = click.prompt("Enter path for output CSV file", type=str)
             out_path = safe_path(raw_out, must_exist=False, is_dir=False)
-            try:
-                flatten_to_csv(in_path, out_path, verbose=verbose)
-                click.secho(f"Flattened CSV written to {out_path}", fg="blue")
-            except Exception as e:
-                click.secho(f"Error: {e}", fg="red", err=True)
+            convert, done_msg = flatten_to_csv, "Flattened CSV written to {}"
+            options = {"workers": jobs}
         else:
             raw_outdir = click.prompt("Enter path for output CSV directory", type=str)
-            out_dir = safe_path(raw_outdir, must_exist=False, is_dir=True)
-            try:
-                normalize_to_csv(in_path, out_dir, verbose=verbose)
-                click.secho(f"Normalized CSVs written under {out_dir}", fg="blue")
-            except Exception as e:
-                click.secho(f"Error: {e}", fg="red", err=True)
+            out_path = safe_path(raw_outdir, must_exist=False, is_dir=True)
+            convert, done_msg = normalize_to_csv, "Normalized CSVs written under {}"
+            options = {}
+        try:
+            written = convert(in_path, out_path, verbose=verbose, compression=compress, **options)
+            click.secho(done_msg.format(written), fg="blue")
+        except Exception as e:
+            click.secho(f"Error: {e}", fg="red", err=True)
 
         # Continue or exit
         if not click.confirm("Convert another JSON file?", default=True):
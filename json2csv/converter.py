@@ -1,148 +1,643 @@
+import os
+import gzip
 import json
+import re
 import csv
-from pathlib import Path
-from collections import OrderedDict
+import queue
+import pickle
+import tempfile
+import threading
+from itertools import count, islice
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import defaultdict
 from pluralizer import Pluralizer
 
 # Initialize pluralizer once
 pluralizer = Pluralizer()
 
-def flatten_to_csv(json_path: str, csv_path: str, verbose: bool=False):
-    data = json.loads(Path(json_path).read_text())
-    if not isinstance(data, list):
-        raise ValueError("Top-level JSON must be an array of objects.")
-
-    rows = []
-    columns = []  # preserve insertion order of columns
-
-    for rec in data:
-        row = OrderedDict()
-        def _flatten(obj, prefix=""):
-            for k, v in obj.items():
-                key = f"{prefix}{k}" if not prefix else f"{prefix}/{k}"
-                if isinstance(v, dict):
-                    _flatten(v, key)
-                elif isinstance(v, list):
-                    for i, item in enumerate(v):
-                        subkey = f"{key}/{i}"
-                        if isinstance(item, dict):
-                            _flatten(item, subkey)
-                        else:
-                            # primitives: preserve original type
-                            row[subkey] = item
-                else:
-                    # scalars: preserve original type (bool,int,str,etc.)
-                    row[key] = v
-        _flatten(rec)
-
-        for col in row.keys():
-            if col not in columns:
-                columns.append(col)
-        rows.append(row)
-
-    # ensure output directory exists
-    Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
-    # write CSV
-    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=columns)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-    if verbose:
-        print(f"[flatten] wrote {len(rows)} rows with {len(columns)} columns")
 
-        
-def normalize_to_csv(json_path: str, out_dir: str, verbose: bool=False):
-    data = json.loads(Path(json_path).read_text())
-    if not isinstance(data, list):
-        raise ValueError("Top-level JSON must be an array of objects.")
+# Pluralizer applies regex rules on every call; table names repeat endlessly
+@lru_cache(maxsize=None)
+def _singular(word: str) -> str:
+    return pluralizer.singular(word)
 
-    out_path = Path(out_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
 
-    tables = {}   # table_name -> list of OrderedDict rows
-    counters = {} # table_name -> auto-increment counter
+@lru_cache(maxsize=None)
+def _plural(word: str) -> str:
+    return pluralizer.plural(word)
 
-    def _new_id(table: str) -> int:
-        counters.setdefault(table, 0)
-        counters[table] += 1
-        return counters[table]
-
-    def _process(obj: dict, table: str, parent_ref=None):
-        tables.setdefault(table, [])
-        # determine PK field name
-        if table == 'root':
-            pk_field = 'root_id'
-            pk_val = _new_id('root')
+# Input is read in chunks of this size (grown as needed for large records)
+_CHUNK_SIZE = 1 << 20
+_WS = re.compile(r"[ \t\n\r]*")
+# What may follow a number that raw_decode cut short at the end of a chunk
+_NUMBER_TAIL = re.compile(r"[-+.eE0-9]*")
+# Inputs with these suffixes hold one JSON document per line
+_NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+# Pre-built "/<i>" suffixes for array indices, most arrays are short
+_INDEX_CACHE = 64
+_INDEX_SUFFIXES = tuple(f"/{i}" for i in range(_INDEX_CACHE))
+# Output files use a large buffer and receive rows in batches of this many
+_WRITE_BUFFER = 1 << 20
+_WRITE_BATCH = 4096
+# Supported output compression -> file suffix appended to the CSV name
+COMPRESSION_SUFFIXES = {'gzip': '.gz'}
+# Characters that force csv.writer to quote a cell (besides the delimiter)
+_QUOTE_CHARS = re.compile(r'["\r\n]')
+# Spooled rows are buffered in memory and pickled to disk in batches of this many
+_SPOOL_ROWS = 4096
+# Records are handed from the reader thread in batches; at most
+# _PREFETCH_DEPTH batches wait in the queue
+_PREFETCH_BATCH = 256
+_PREFETCH_DEPTH = 4
+_DONE = object()
+# Marks an absent key where None is a valid JSON value
+_MISSING = object()
+# Container types a flattened cell may not hold; they are walked instead
+_NESTED = frozenset((dict, list))
+# Records nested deeper than this, or holding more values than this (e.g. a
+# huge array), are not given a generated flattener
+_SPECIALIZE_DEPTH = 64
+_SPECIALIZE_VALUES = 4096
+# NDJSON lines are shipped to flatten worker processes in batches of this many
+_WORKER_BATCH = 1024
+
+
+def iter_json_records(json_path: str):
+    """
+    Iterate over the records of a JSON input one at a time: the elements of
+    a top-level array, or one document per line for .ndjson/.jsonl files.
+    """
+    if str(json_path).lower().endswith(_NDJSON_SUFFIXES):
+        return _iter_json_lines(json_path)
+    return _iter_json_array(json_path)
+
+
+def _iter_json_lines(json_path: str):
+    with open(json_path, 'r', encoding='utf-8', buffering=_CHUNK_SIZE) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_json_array(json_path: str):
+    # the file is decoded chunk by chunk, so memory stays bounded by the
+    # largest single record instead of the whole document
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8', buffering=_CHUNK_SIZE) as f:
+        if hasattr(os, 'posix_fadvise'):
+            # the file is read front to back once; let the kernel read ahead further
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass  # only a hint; pipes and FIFOs reject it
+        buf, pos = f.read(_CHUNK_SIZE), 0
+
+        def _more() -> bool:
+            # append the next chunk, dropping what has already been consumed
+            nonlocal buf, pos
+            chunk = f.read(max(_CHUNK_SIZE, len(buf) - pos))
+            if not chunk:
+                return False
+            buf, pos = buf[pos:] + chunk, 0
+            return True
+
+        def _skip_ws():
+            nonlocal pos
+            while True:
+                pos = _WS.match(buf, pos).end()
+                if pos < len(buf) or not _more():
+                    return
+
+        _skip_ws()
+        if buf[pos:pos + 1] != '[':
+            raise ValueError("Top-level JSON must be an array of objects.")
+        pos += 1
+        _skip_ws()
+        if buf[pos:pos + 1] == ']':
+            pos += 1
         else:
-            pk_field = f"{pluralizer.singular(table)}_id"
-            # use JSON 'id' if available, else generate
-            if 'id' in obj and not isinstance(obj['id'], (dict, list)):
-                pk_val = obj['id']
-            else:
-                pk_val = _new_id(table)
-        # start row
-        row = OrderedDict([(pk_field, pk_val)])
-        # attach FK to parent
-        if parent_ref:
-            _, fk_field, parent_id = parent_ref
-            row[fk_field] = parent_id
-
-        # separate scalars and nested
-        nested = []
-        for key, val in obj.items():
-            if key == 'id':
+            while True:
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if _more():
+                            continue
+                        raise
+                    # a number running up to the buffer edge may be truncated, and raw_decode
+                    # stops early on a cut-off fraction or exponent ("1." decodes as 1)
+                    if _NUMBER_TAIL.fullmatch(buf, end) and _more():
+                        continue
+                    break
+                pos = end
+                yield value
+                _skip_ws()
+                sep = buf[pos:pos + 1]
+                pos += 1
+                if sep == ']':
+                    break
+                if sep != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos - 1)
+                _skip_ws()
+        _skip_ws()
+        if pos < len(buf):
+            raise json.JSONDecodeError("Extra data", buf, pos)
+
+
+def _prefetch(records):
+    """
+    Pull `records` on a background thread and yield them from a bounded
+    queue, so reading and parsing the input overlaps with flattening and
+    writing in the caller.
+    """
+    q = queue.Queue(maxsize=_PREFETCH_DEPTH)
+    stop = threading.Event()
+    error = []
+
+    def _produce():
+        try:
+            it = iter(records)
+            while not stop.is_set():
+                batch = list(islice(it, _PREFETCH_BATCH))
+                if not batch:
+                    break
+                q.put(batch)
+        except BaseException as e:  # re-raised on the consumer side
+            error.append(e)
+        finally:
+            close = getattr(records, 'close', None)
+            if close is not None:
+                close()
+            q.put(_DONE)
+
+    reader = threading.Thread(target=_produce, name="json2csv-reader", daemon=True)
+    reader.start()
+    batch = None
+    try:
+        while (batch := q.get()) is not _DONE:
+            yield from batch
+    finally:
+        if batch is not _DONE:
+            # consumer stopped early: unblock the reader and let it finish
+            stop.set()
+            while q.get() is not _DONE:
+                pass
+        reader.join()
+    if error:
+        raise error[0]
+
+
+class _RowSpool:
+    """
+    Temporary store for rows that tracks the union of their columns, so a
+    CSV header can be written up front without keeping every row in memory.
+    Rows are buffered in memory and, once _SPOOL_ROWS of them pile up,
+    pickled to a temp file as one batch; small tables never touch disk.
+
+    A row is kept as (shape, values): its values in key order plus a shared
+    per-key-set tuple of column positions, so column names are not stored
+    per row and the header is only extended when a new key set shows up.
+    A row may also be given as a bare tuple of values for the leading
+    columns, in header order.
+    """
+
+    def __init__(self):
+        # column name -> position; insertion-ordered, O(1) membership
+        self._columns = {}
+        # tuple of row keys -> column positions, or None when the keys are
+        # exactly the leading columns in order (the uniform-schema case)
+        self._shapes = {}
+        self.count = 0
+        self._rows = []
+        self._file = None  # created on the first spill
+
+    def append(self, row: dict):
+        self.extend((row,))
+
+    def extend(self, rows):
+        # bulk path: bind hot attributes once for the whole batch
+        shapes = self._shapes
+        buffered = self._rows
+        n = 0
+        for row in rows:
+            if type(row) is tuple:
+                buffered.append((None, row))
+                if len(buffered) >= _SPOOL_ROWS:
+                    self._spill()
+                n += 1
                 continue
-            if isinstance(val, (dict, list)):
-                nested.append((key, val))
+            keys = tuple(row)
+            try:
+                shape = shapes[keys]
+            except KeyError:
+                shape = shapes[keys] = self._add_shape(keys)
+            buffered.append((shape, tuple(row.values())))
+            if len(buffered) >= _SPOOL_ROWS:
+                self._spill()
+            n += 1
+        self.count += n
+
+    def _add_shape(self, keys: tuple):
+        columns = self._columns
+        for k in keys:
+            if k not in columns:
+                columns[k] = len(columns)
+        positions = tuple(columns[k] for k in keys)
+        return None if positions == tuple(range(len(keys))) else positions
+
+    def _spill(self):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile('w+b', buffering=_WRITE_BUFFER)
+        # one pickle per batch: C-speed, lossless for any JSON value, and
+        # shared shape tuples are memoized within the batch
+        pickle.dump(self._rows, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._rows.clear()
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    def _stored(self):
+        if self._file is not None:
+            self._file.flush()
+            self._file.seek(0)
+            while True:
+                try:
+                    batch = pickle.load(self._file)
+                except EOFError:
+                    break
+                yield from batch
+        yield from self._rows
+
+    def __iter__(self):
+        # yield full-width lists in header order; missing cells are None
+        width = len(self._columns)
+        for shape, values in self._stored():
+            if shape is None:
+                row = list(values)
+                row.extend([None] * (width - len(row)))
             else:
-                row[key] = val
-        tables[table].append(row)
-
-        # recurse nested
-        for key, val in nested:
-            child_table = pluralizer.plural(key)
-            fk_field = 'root_id' if table == 'root' else pk_field
-            if isinstance(val, dict):
-                if val:
-                    _process(val, child_table, (table, fk_field, pk_val))
+                row = [None] * width
+                for i, v in zip(shape, values):
+                    row[i] = v
+            yield row
+
+    def close(self):
+        self._rows.clear()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _output_path(path, compression) -> str:
+    if compression is None:
+        return str(path)
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unsupported compression: {compression}")
+    path, suffix = str(path), COMPRESSION_SUFFIXES[compression]
+    return path if path.endswith(suffix) else path + suffix
+
+
+def flatten_to_csv(json_path: str, csv_path: str, verbose: bool=False, compression: str=None,
+                   workers: int=1):
+    csv_path = _output_path(csv_path, compression)
+    with _RowSpool() as spool:
+        # pass 1: flatten records to the spool while collecting the header
+        if workers > 1 and str(json_path).lower().endswith(_NDJSON_SUFFIXES):
+            spool.extend(_flatten_lines_parallel(json_path, workers))
+        else:
+            spool.extend(_flatten_rows(_prefetch(iter_json_records(json_path))))
+
+        # ensure output directory exists
+        os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+        # pass 2: stream the spooled rows back out as CSV
+        _write_csv(csv_path, spool.columns, spool, compression)
+    if verbose:
+        print(f"[flatten] wrote {spool.count} rows with {len(spool.columns)} columns")
+    return csv_path
+
+
+def _flatten_lines(lines: list) -> list:
+    return [_flatten_record(json.loads(line)) for line in lines if line.strip()]
+
+
+def _flatten_lines_parallel(json_path: str, workers: int):
+    """
+    Parse and flatten NDJSON records in worker processes. Raw lines are cheap
+    to hand out, so only splitting them into batches stays in this process;
+    rows come back in input order.
+    """
+    pending = []
+    with open(json_path, 'rb', buffering=_CHUNK_SIZE) as f, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        batches = iter(lambda: list(islice(f, _WORKER_BATCH)), [])
+        # keep a couple of batches per worker in flight to bound memory
+        for batch in islice(batches, 2 * workers):
+            pending.append(executor.submit(_flatten_lines, batch))
+        while pending:
+            rows = pending.pop(0).result()
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append(executor.submit(_flatten_lines, batch))
+            yield from rows
+
+
+# Nested values that stay in a single cell are written as compact JSON
+_encode_cell = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def _format_cell(v) -> str:
+    # the text of a cell before any quoting
+    t = type(v)
+    if t is str:
+        return v
+    if v is None:
+        return ''
+    if t is list or t is dict:
+        return _encode_cell(v)
+    return str(v)
+
+
+def _open_csv(file_path, compression):
+    if compression == 'gzip':
+        # level 1: most of the size win for a fraction of the CPU
+        return gzip.open(file_path, 'wt', compresslevel=1, encoding='utf-8', newline='')
+    return open(file_path, 'w', newline='', encoding='utf-8', buffering=_WRITE_BUFFER)
+
+
+def _write_csv(file_path, columns: list, rows, compression: str=None):
+    width = len(columns)
+    with _open_csv(file_path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        # runs of plain lines and of rows that need quoting, in output order;
+        # at most one of them is pending at a time
+        lines, quoted = [], []
+
+        def _flush():
+            if lines:
+                f.write('\r\n'.join(lines) + '\r\n')
+                lines.clear()
+            if quoted:
+                writer.writerows(quoted)
+                quoted.clear()
+
+        # rows are sequences in header order; None cells are written empty
+        rows = iter(rows)
+        while batch := list(islice(rows, _WRITE_BATCH)):
+            # fast path: when no cell needs quoting, the joined text is exactly
+            # what csv.writer would produce; the whole batch is checked in one
+            # pass of C-level counts and written at once
+            formatted = [','.join(map(_format_cell, row)) for row in batch]
+            text = '\r\n'.join(formatted)
+            n = len(batch)
+            if (width > 1 and text.count(',') == (width - 1) * n and '"' not in text
+                    and text.count('\n') == n - 1 and text.count('\r') == n - 1):
+                f.write(text)
+                f.write('\r\n')
+                continue
+            # otherwise sort the batch out row by row
+            for row, line in zip(batch, formatted):
+                if line.count(',') == width - 1 and not _QUOTE_CHARS.search(line) and (line or width > 1):
+                    if quoted:
+                        _flush()
+                    lines.append(line)
+                else:
+                    if lines:
+                        _flush()
+                    quoted.append(list(map(_format_cell, row)))
+            _flush()
+
+
+def _flatten_record(rec: dict) -> dict:
+    row = {}
+    # depth-first walk with an explicit stack of (items iterator, prefix, in_list)
+    # frames instead of recursion; a frame resumes after its children, which
+    # keeps the column order of the recursive walk
+    stack = [(iter(rec.items()), "", False)]
+    while stack:
+        items, prefix, in_list = stack[-1]
+        for k, v in items:
+            if in_list:
+                key = prefix + _INDEX_SUFFIXES[k] if k < _INDEX_CACHE else f"{prefix}/{k}"
             else:
+                key = f"{prefix}/{k}" if prefix else k
+            t = type(v)
+            if t is dict:
+                stack.append((iter(v.items()), key, False))
+                break
+            if t is list and not in_list:
+                stack.append((iter(enumerate(v)), key, True))
+                break
+            # scalars (and lists nested in lists): preserve original type
+            row[key] = v
+        else:
+            stack.pop()
+    return row
+
+
+def _flatten_rows(records):
+    """
+    Flatten records for a _RowSpool. A flattener is generated for the
+    structure of the first record; later records with the same structure come
+    out of it as value tuples in the first record's column order, and any
+    other record falls back to _flatten_record.
+    """
+    records = iter(records)
+    first = next(records, _DONE)
+    if first is _DONE:
+        return
+    row = _flatten_record(first)
+    yield row
+    flatten = _compile_flattener(first, tuple(row))
+    if flatten is None:
+        yield from map(_flatten_record, records)
+        return
+    for rec in records:
+        try:
+            values = flatten(rec)
+        except (KeyError, ValueError):
+            values = None
+        yield _flatten_record(rec) if values is None else values
+
+
+class _TooComplex(Exception):
+    pass
+
+
+def _compile_flattener(sample: dict, columns: tuple):
+    # Emit straight-line code that reads every value of `sample`'s structure
+    # by key and index, checking along the way that a record has exactly that
+    # structure (same keys, same list lengths, no container where the sample
+    # has a cell). It returns None, or raises KeyError/ValueError, otherwise.
+    if type(sample) is not dict:
+        return None
+    lines, keys, leaves, cells, items = [], [], [], [], []
+    names, visited = count(), count()
+
+    def _emit(expr: str, value, key: str, depth: int, in_list: bool):
+        if depth > _SPECIALIZE_DEPTH or next(visited) >= _SPECIALIZE_VALUES:
+            raise _TooComplex
+        t = type(value)
+        if t is dict:
+            var = f"n{next(names)}"
+            lines.append(f"{var} = {expr}")
+            lines.append(f"if type({var}) is not dict or len({var}) != {len(value)}: return None")
+            for k, v in value.items():
+                _emit(f"{var}[{k!r}]", v, f"{key}/{k}" if key else k, depth + 1, False)
+        elif t is list and not in_list:
+            if len(value) >= _SPECIALIZE_VALUES:
+                raise _TooComplex
+            var = f"n{next(names)}"
+            lines.append(f"{var} = {expr}")
+            lines.append(f"if type({var}) is not list: return None")
+            elements = [f"n{next(names)}" for _ in value]
+            # unpacking raises ValueError on a length mismatch
+            lines.append(f"{', '.join(elements)}, = {var}" if elements else f"if {var}: return None")
+            for i, (element, v) in enumerate(zip(elements, value)):
+                _emit(element, v, f"{key}/{i}", depth + 1, True)
+        else:
+            cell = expr if expr.isidentifier() else f"v{len(keys)}"
+            if cell != expr:
+                lines.append(f"{cell} = {expr}")
+            keys.append(key)
+            leaves.append(cell)
+            (items if in_list else cells).append(cell)
+
+    try:
+        _emit("rec", sample, "", 0, False)
+    except _TooComplex:
+        return None
+    # colliding keys ("a/b" next to {"a": {"b": ...}}) depend on key order; leave them generic
+    if not keys or tuple(keys) != columns:
+        return None
+    lines.append(f"row = ({', '.join(leaves)},)")
+    # cells must not be containers; list items may be lists (kept whole) but not dicts
+    if items:
+        lines.append(f"if not _NESTED.isdisjoint(map(type, ({''.join(c + ', ' for c in cells)}))): return None")
+        lines.append(f"if dict in map(type, ({''.join(c + ', ' for c in items)})): return None")
+    else:
+        lines.append("if not _NESTED.isdisjoint(map(type, row)): return None")
+    lines.append("return row")
+    namespace = {'_NESTED': _NESTED}
+    exec("def _flatten(rec):\n" + "".join(f"    {line}\n" for line in lines), namespace)
+    return namespace['_flatten']
+
+
+def normalize_to_csv(json_path: str, out_dir: str, verbose: bool=False, compression: str=None):
+    suffix = _output_path(".csv", compression)
+    tables = {}   # table_name -> _RowSpool of its rows and columns
+    counters = defaultdict(lambda: count(1))  # table_name -> auto-increment id sequence
+
+    def _add_row(table: str, row: dict):
+        # rows are spooled as soon as they are built; headers are settled at the end
+        spool = tables.get(table)
+        if spool is None:
+            spool = tables[table] = _RowSpool()
+        spool.append(row)
+
+    def _new_id(table: str) -> int:
+        return next(counters[table])
+
+    def _process(record: dict):
+        # depth-first walk with an explicit stack instead of recursion; entries
+        # are (dict or primitive array, table, (fk_field, parent_id) or None,
+        # is_values) and children are pushed in reverse so they come off the
+        # stack in document order, keeping ids and table order unchanged
+        stack = [(record, 'root', None, False)]
+        while stack:
+            obj, table, parent_ref, is_values = stack.pop()
+            if is_values:
                 # array of primitives
-                if all(not isinstance(i, (dict, list)) for i in val):
-                    for item in val:
-                        child_pk = f"{pluralizer.singular(child_table)}_id"
-                        # if JSON object has 'id', use it
-                        if isinstance(item, dict) and 'id' in item:
-                            child_val = item['id']
-                        else:
-                            child_val = _new_id(child_table)
-                        child_row = OrderedDict([
-                            (child_pk, child_val),
-                            (fk_field, pk_val),
-                            (pluralizer.singular(child_table), item if not isinstance(item, dict) else item.get(pluralizer.singular(child_table)))
-                        ])
-                        tables.setdefault(child_table, []).append(child_row)
+                fk_field, parent_id = parent_ref
+                value_field = _singular(table)
+                child_pk = f"{value_field}_id"
+                # items are never dicts here, so every value row gets a generated id
+                for item in obj:
+                    child_row = {child_pk: _new_id(table), fk_field: parent_id, value_field: item}
+                    _add_row(table, child_row)
+                continue
+
+            # determine PK field name
+            if table == 'root':
+                pk_field = 'root_id'
+                pk_val = _new_id('root')
+            else:
+                pk_field = f"{_singular(table)}_id"
+                # use JSON 'id' if available, else generate
+                id_val = obj.get('id', _MISSING)
+                if id_val is not _MISSING and type(id_val) is not dict and type(id_val) is not list:
+                    pk_val = id_val
+                else:
+                    pk_val = _new_id(table)
+            # start row
+            row = {pk_field: pk_val}
+            # attach FK to parent
+            if parent_ref:
+                fk_field, parent_id = parent_ref
+                row[fk_field] = parent_id
+
+            # separate scalars and nested
+            nested = []
+            for key, val in obj.items():
+                if key == 'id':
+                    continue
+                # exact type checks: decoded JSON only holds plain dicts and lists
+                t = type(val)
+                if t is dict or t is list:
+                    nested.append((key, val))
+                else:
+                    row[key] = val
+            _add_row(table, row)
+
+            # queue nested values
+            child_ref = ('root_id' if table == 'root' else pk_field, pk_val)
+            children = []
+            for key, val in nested:
+                child_table = _plural(key)
+                if type(val) is dict:
+                    if val:
+                        children.append((val, child_table, child_ref, False))
                 else:
+                    # stop at the first nested item instead of scanning the whole array
                     for item in val:
-                        _process(item, child_table, (table, fk_field, pk_val))
-
-    # process records
-    for record in data:
-        _process(record, 'root', None)
-
-    # write CSVs
-    for tbl, rows in tables.items():
-        file_path = out_path / f"{tbl}.csv"
-        columns = []
-        for r in rows:
-            for c in r.keys():
-                if c not in columns:
-                    columns.append(c)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            for r in rows:
-                writer.writerow(r)
-        if verbose:
-            print(f"[normalize] wrote {len(rows)} rows to {tbl}.csv")
+                        t = type(item)
+                        if t is dict or t is list:
+                            children.extend((item, child_table, child_ref, False) for item in val)
+                            break
+                    else:
+                        children.append((val, child_table, child_ref, True))
+            stack.extend(reversed(children))
+
+    def _write_table(tbl: str, spool: _RowSpool) -> int:
+        file_path = os.path.join(out_path, f"{tbl}{suffix}")
+        _write_csv(file_path, spool.columns, spool, compression)
+        return spool.count
+
+    try:
+        # process records as they are streamed from the input
+        for record in _prefetch(iter_json_records(json_path)):
+            _process(record)
+
+        out_path = os.fspath(out_dir)
+        # table names keep any '/' from their JSON key, so some tables live in
+        # subdirectories; create each distinct one once, before the writers start
+        for sub_dir in {os.path.dirname(tbl) for tbl in tables} | {''}:
+            os.makedirs(os.path.join(out_path, sub_dir), exist_ok=True)
+
+        # write CSVs; every table is its own file, so they are written concurrently
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            written = pool.map(_write_table, tables.keys(), tables.values())
+            for tbl, n in zip(tables, written):
+                if verbose:
+                    print(f"[normalize] wrote {n} rows to {tbl}{suffix}")
+    finally:
+        for spool in tables.values():
+            spool.close()
+    return out_path
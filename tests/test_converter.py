@@ -1,9 +1,14 @@
+import os
+import io
+import gzip
 import json
 import tempfile
+import threading
 import csv
 from pathlib import Path
 import pytest
-from json2csv.converter import flatten_to_csv, normalize_to_csv
+from json2csv import converter
+from json2csv.converter import flatten_to_csv, normalize_to_csv, iter_json_records
 from json2csv.utils import safe_path
 
 SAMPLE = [
@@ -127,3 +132,153 @@ def test_flatten_and_normalize_roundtrip(tmp_path):
     reader = csv.DictReader(open(root_csv))
     cols = reader.fieldnames
     assert 'root_id' in cols
+
+def test_iter_json_records_small_chunks(tmp_path, monkeypatch):
+    # force records and numbers to straddle chunk boundaries, including
+    # top-level numbers cut inside their fraction or exponent
+    sample = make_complex_sample() + [{"n": 1234567890123, "s": "a \\ \" ]"}]
+    numbers = [1.5, 2e10, -3.25e4, 10, 0.125, -7]
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps(sample, indent=2))
+    nf = tmp_path / "numbers.json"
+    nf.write_text("[1.5, 2e10, -3.25E+4, 10,0.125 ,-7]")
+    for size in range(1, 25):
+        monkeypatch.setattr(converter, "_CHUNK_SIZE", size)
+        assert list(iter_json_records(str(jf))) == sample
+        assert list(iter_json_records(str(nf))) == numbers
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_flatten_from_pipe(tmp_path):
+    fifo = tmp_path / "in.json"
+    os.mkfifo(fifo)
+    writer = threading.Thread(target=fifo.write_text, args=(json.dumps(SAMPLE),))
+    writer.start()
+    out = tmp_path / "flat.csv"
+    flatten_to_csv(str(fifo), str(out))
+    writer.join()
+    assert len(read_csv(out)) == 2
+
+@pytest.mark.parametrize("text", ['{"a": 1}', '[{"a": 1}] []', '[{"a": 1} {"b": 2}]'])
+def test_iter_json_records_invalid(tmp_path, text):
+    jf = tmp_path / "bad.json"
+    jf.write_text(text)
+    with pytest.raises(ValueError):
+        list(iter_json_records(str(jf)))
+
+def test_iter_json_records_keeps_big_ints(tmp_path):
+    sample = [{"id": 10**20, "n": 2**63}, {"id": 1.5}]
+    jf = tmp_path / "big.json"
+    jf.write_text(json.dumps(sample))
+    assert list(iter_json_records(str(jf))) == sample
+
+def test_normalize_spooled_to_disk(tmp_path, monkeypatch):
+    sample = make_complex_sample()
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps(sample))
+    normalize_to_csv(str(jf), str(tmp_path / "mem"))
+    # every row is pickled to the spool's temp file right away
+    monkeypatch.setattr(converter, "_SPOOL_ROWS", 1)
+    normalize_to_csv(str(jf), str(tmp_path / "disk"))
+    for name in ["root", "users", "prefs", "alerts", "items", "tags"]:
+        assert read_csv(tmp_path / "disk" / f"{name}.csv") == read_csv(tmp_path / "mem" / f"{name}.csv")
+
+def test_write_csv_matches_csv_writer(tmp_path):
+    columns = ["a", "b", "c"]
+    rows = [
+        {"a": 1, "b": "plain", "c": 2.5},
+        {"a": "x,y", "b": 'say "hi"', "c": "two\nlines"},
+        {"a": "back,to", "b": "back"},
+        {"a": None, "b": True},
+        {"a": "", "b": "", "c": ""},
+        {"c": "\r"},
+    ]
+    out = tmp_path / "out.csv"
+    converter._write_csv(out, columns, [[r.get(c) for c in columns] for r in rows])
+    expected = io.StringIO()
+    writer = csv.writer(expected)
+    writer.writerow(columns)
+    writer.writerows([r.get(c, "") for c in columns] for r in rows)
+    assert out.read_bytes().decode("utf-8") == expected.getvalue()
+
+def test_prefetch_order_and_errors():
+    assert list(converter._prefetch(iter(range(1000)))) == list(range(1000))
+
+    def broken():
+        yield 1
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        list(converter._prefetch(broken()))
+    # stopping early must not leave the reader thread blocked
+    stream = converter._prefetch(iter(range(10_000)))
+    assert next(stream) == 0
+    stream.close()
+
+def test_gzip_output(tmp_path):
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps(SAMPLE))
+    flatten_to_csv(str(jf), str(tmp_path / "plain.csv"))
+    written = flatten_to_csv(str(jf), str(tmp_path / "flat.csv"), compression="gzip")
+    assert written == str(tmp_path / "flat.csv.gz")
+    with gzip.open(written, "rt", newline="", encoding="utf-8") as f:
+        assert list(csv.DictReader(f)) == read_csv(tmp_path / "plain.csv")
+    normalize_to_csv(str(jf), str(tmp_path / "norm"), compression="gzip")
+    with gzip.open(tmp_path / "norm" / "tags.csv.gz", "rt", newline="", encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == 2
+    with pytest.raises(ValueError):
+        flatten_to_csv(str(jf), str(tmp_path / "x.csv"), compression="bz2")
+
+def test_ndjson_input(tmp_path):
+    jf = tmp_path / "in.ndjson"
+    jf.write_text("\n".join(json.dumps(r) for r in SAMPLE) + "\n\n")
+    assert list(iter_json_records(str(jf))) == SAMPLE
+    out = tmp_path / "flat.csv"
+    flatten_to_csv(str(jf), str(out))
+    assert len(read_csv(out)) == 2
+
+def test_flatten_ndjson_with_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(converter, "_WORKER_BATCH", 1)
+    jf = tmp_path / "in.jsonl"
+    jf.write_text("\n".join(json.dumps(r) for r in SAMPLE * 5) + "\n")
+    serial, parallel = tmp_path / "serial.csv", tmp_path / "parallel.csv"
+    flatten_to_csv(str(jf), str(serial))
+    flatten_to_csv(str(jf), str(parallel), workers=2)
+    assert parallel.read_bytes() == serial.read_bytes()
+
+def test_normalize_slash_in_nested_key(tmp_path):
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps([{"id": 1, "geo/location": {"lat": 1}, "tags": ["a"]}]))
+    outdir = tmp_path / "norm"
+    normalize_to_csv(str(jf), str(outdir))
+    assert read_csv(outdir / "geo" / "locations.csv") == [{"geo/location_id": "1", "root_id": "1", "lat": "1"}]
+    assert len(read_csv(outdir / "tags.csv")) == 1
+
+def test_nested_list_cells_are_json(tmp_path):
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps([{"grid": [[1, "é"], [None, {"a": True}]]}]))
+    out = tmp_path / "flat.csv"
+    flatten_to_csv(str(jf), str(out))
+    assert read_csv(out) == [{"grid/0": '[1,"é"]', "grid/1": '[null,{"a":true}]'}]
+
+def test_specialized_flattener_matches_generic(tmp_path, monkeypatch):
+    first = {"id": 1, "a": {"b": 2, "c": [1, [2]]}, "tags": ["x", {"y": None}], "e": []}
+    records = [
+        first,
+        {"e": [], "tags": ["z", {"y": 3}], "a": {"c": [4, [5]], "b": 6}, "id": 2},  # keys reordered
+        dict(first, tags=["only"]),    # shorter list
+        dict(first, e=[7]),            # non-empty where the sample is empty
+        dict(first, id={"nested": 8}), # container where the sample has a cell
+        {"id": 9, "extra": True},      # different keys
+    ]
+    jf = tmp_path / "in.json"
+    jf.write_text(json.dumps(records))
+    flatten_to_csv(str(jf), str(tmp_path / "special.csv"))
+    monkeypatch.setattr(converter, "_compile_flattener", lambda sample, columns: None)
+    flatten_to_csv(str(jf), str(tmp_path / "generic.csv"))
+    assert (tmp_path / "special.csv").read_bytes() == (tmp_path / "generic.csv").read_bytes()
+
+def test_specialized_flattener_size_limit(monkeypatch):
+    monkeypatch.setattr(converter, "_SPECIALIZE_VALUES", 8)
+    small, big = {"id": 1, "xs": [1, 2, 3]}, {"id": 1, "xs": list(range(8))}
+    assert converter._compile_flattener(small, ("id", "xs/0", "xs/1", "xs/2"))(small) == (1, 1, 2, 3)
+    assert converter._compile_flattener(big, tuple(converter._flatten_record(big))) is None